@@ -15,119 +15,164 @@ Kristian Rother.
 
 
 import re
+from functools import lru_cache
 
 from Bio import File
 
 
-def _get_journal(inl):
-    # JRNL        AUTH   L.CHEN,M.DOI,F.S.MATHEWS,A.Y.CHISTOSERDOV,           2BBK   7
-    journal = ""
-    for l in inl:
-        if re.search(r"\AJRNL", l):
-            journal += l[19:72].lower()
-    journal = re.sub(r"\s\s+", " ", journal)
-    return journal
+_RE_WS = re.compile(r"\s\s+")
+_RE_ANGSTROM = re.compile(r"\s+ANGSTROM.*")
+_RE_DATE = re.compile(r"\d\d-\w\w\w-\d\d")
+_RE_IDCODE = re.compile(r"\s+([1-9][0-9A-Z]{3})\s*\Z")
+_RE_EC = re.compile(r"\d+\.\d+\.\d+\.\d+")
+_RE_EC_PAREN = re.compile(r"\((e\.c\.)*\d+\.\d+\.\d+\.\d+\)")
+_RE_EXPDTA_TAIL = re.compile(r"\s\s\s\s\s\s\s.*\Z")
+_RE_REMARK_465 = re.compile(
+    r"""
+    (\d+\s[\sA-Z][\sA-Z][A-Z] |   # Either model number + residue name
+        [A-Z]{1,3})               # Or only residue name with 1 (RNA) to 3 letters
+    \s ([A-Za-z0-9])              # A single character chain
+    \s+(-?\d+[A-Za-z]?)$          # Residue number: A digit followed by an optional
+                                  # insertion code (Hetero-flags make no sense in
+                                  # context with missing res)
+    """,
+    re.VERBOSE,
+)
+# First letter a-z at the start of the line or after a separator
+_RE_NICE_CASE = re.compile(r"(\A|[ .,;:\t_-])([^a-z .,;:\t_-]*)([a-z])")
+_RE_NICE_CASE_SIMPLE = re.compile(r"[a-z .,;:\t_-]*")
 
 
-def _get_references(inl):
-    # REMARK   1 REFERENCE 1                                                  1CSE  11
-    # REMARK   1  AUTH   W.BODE,E.PAPAMOKOS,D.MUSIL                           1CSE  12
-    references = []
-    actref = ""
-    for l in inl:
-        if re.search(r"\AREMARK   1", l):
-            if re.search(r"\AREMARK   1 REFERENCE", l):
-                if actref != "":
-                    actref = re.sub(r"\s\s+", " ", actref)
-                    if actref != " ":
-                        references.append(actref)
-                    actref = ""
-            else:
-                actref += l[19:72].lower()
-
-    if actref != "":
-        actref = re.sub(r"\s\s+", " ", actref)
-        if actref != " ":
-            references.append(actref)
-    return references
+def _add_reference(references, actref):
+    """Append the reference collected in the list actref, if any (PRIVATE)."""
+    ref = "".join(actref)
+    if ref != "":
+        ref = _RE_WS.sub(" ", ref)
+        if ref != " ":
+            references.append(ref)
+
+
+_MONTH_IDX = {
+    "JAN": "01",
+    "FEB": "02",
+    "MAR": "03",
+    "APR": "04",
+    "MAY": "05",
+    "JUN": "06",
+    "JUL": "07",
+    "AUG": "08",
+    "SEP": "09",
+    "OCT": "10",
+    "NOV": "11",
+    "DEC": "12",
+}
 
 
 # bring dates to format: 1909-01-08
+@lru_cache(maxsize=1024)
 def _format_date(pdb_date):
     """Convert dates from DD-Mon-YY to YYYY-MM-DD format (PRIVATE)."""
-    date = ""
     year = int(pdb_date[7:])
     if year < 50:
         century = 2000
     else:
         century = 1900
-    date = str(century + year) + "-"
-    all_months = [
-        "xxx",
-        "Jan",
-        "Feb",
-        "Mar",
-        "Apr",
-        "May",
-        "Jun",
-        "Jul",
-        "Aug",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dec",
-    ]
-    month = str(all_months.index(pdb_date[3:6]))
-    if len(month) == 1:
-        month = "0" + month
-    date = date + month + "-" + pdb_date[:2]
-    return date
+    return f"{century + year}-{_MONTH_IDX[pdb_date[3:6].upper()]}-{pdb_date[:2]}"
+
+
+def _is_word(text):
+    """Check all characters would be matched by a regex word character (PRIVATE)."""
+    return text.replace("_", "a").isalnum()
 
 
 def _chop_end_codes(line):
-    """Chops lines ending with  '     1CSA  14' and the like (PRIVATE)."""
-    return re.sub(r"\s\s\s\s+[\w]{4}.\s+\d*\Z", "", line)
+    """Chops lines ending with  '     1CSA  14' and the like (PRIVATE).
+
+    The tail removed is four or more spaces, a four character code, any
+    single character, more spaces and an optional serial number. The line
+    is scanned backwards from its end rather than using a regular expression.
+    """
+    line = line.rstrip()
+    end = len(line)
+    while end and line[end - 1].isdecimal():
+        end -= 1
+    code_stop = len(line[:end].rstrip())
+    if code_stop == end:
+        # serial number not preceded by whitespace
+        return line
+    # The single wildcard character is either the one after the code
+    # (and right before the whitespace) or the first whitespace itself.
+    for start in (code_stop - 5, code_stop - 4):
+        if start < 0:
+            continue
+        if start == code_stop - 4 and end - code_stop < 2:
+            continue
+        if _is_word(line[start : start + 4]):
+            head = line[:start].rstrip()
+            if start - len(head) >= 4:
+                return head
+    return line
 
 
 def _chop_end_misc(line):
     """Chops lines ending with  '     14-JUL-97  1CSA' and the like (PRIVATE)."""
-    return re.sub(r"\s+\d\d-\w\w\w-\d\d\s+[1-9][0-9A-Z]{3}\s*\Z", "", line)
+    line = line.rstrip()
+    idcode = line[-4:]
+    if (
+        len(idcode) != 4
+        or idcode[0] not in "123456789"
+        or idcode.strip("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    ):
+        return line
+    date_end = len(line[:-4].rstrip())
+    if date_end == len(line) - 4:
+        return line
+    date = line[date_end - 9 : date_end]
+    if (
+        len(date) == 9
+        and date[:2].isdecimal()
+        and date[2] == "-"
+        and _is_word(date[3:6])
+        and date[6] == "-"
+        and date[7:].isdecimal()
+    ):
+        head = line[: date_end - 9].rstrip()
+        if len(head) < date_end - 9:
+            return head
+    return line
 
 
+def _capitalize_match(match):
+    """Upper case the letter found by _RE_NICE_CASE (PRIVATE)."""
+    return match.group(1) + match.group(2) + match.group(3).upper()
+
+
+# AUTHOR lines often recur between entries, and are at most one line long
+@lru_cache(maxsize=4096)
 def _nice_case(line):
     """Make A Lowercase String With Capitals (PRIVATE)."""
-    line_lower = line.lower()
-    s = ""
-    i = 0
-    nextCap = 1
-    while i < len(line_lower):
-        c = line_lower[i]
-        if c >= "a" and c <= "z" and nextCap:
-            c = c.upper()
-            nextCap = 0
-        elif c in " .,;:\t-_":
-            nextCap = 1
-        s += c
-        i += 1
-    return s
-
-
-def parse_pdb_header(infile):
+    line = line.lower()
+    if _RE_NICE_CASE_SIMPLE.fullmatch(line):
+        # Only letters a-z and separators, where str.title gives the same
+        return line.title()
+    return _RE_NICE_CASE.sub(_capitalize_match, line)
+
+
+def parse_pdb_header(infile, fields=None):
     """Return the header lines of a pdb file as a dictionary.
 
     Dictionary keys are: head, deposition_date, release_date, structure_method,
     resolution, structure_reference, journal_reference, author and
     compound.
+
+    Optional argument fields is a collection of the dictionary keys wanted,
+    for example ``["resolution", "structure_method"]``, or a single key as a
+    string. Only the records needed for these are then parsed, the file is
+    read no further than necessary, and the dictionary returned holds just
+    these keys.
     """
-    header = []
     with File.as_handle(infile) as f:
-        for l in f:
-            record_type = l[0:6]
-            if record_type in ("ATOM  ", "HETATM", "MODEL "):
-                break
-            else:
-                header.append(l)
-    return _parse_pdb_header_list(header)
+        return _parse_pdb_header_list(f, fields)
 
 
 def _parse_remark_465(line):
@@ -145,18 +190,7 @@ def _parse_remark_465(line):
     if line:
         # Note that line has been stripped.
         assert line[0] != " " and line[-1] not in "\n ", "line has to be stripped"
-    pattern = re.compile(
-        r"""
-        (\d+\s[\sA-Z][\sA-Z][A-Z] |   # Either model number + residue name
-            [A-Z]{1,3})               # Or only residue name with 1 (RNA) to 3 letters
-        \s ([A-Za-z0-9])              # A single character chain
-        \s+(-?\d+[A-Za-z]?)$          # Residue number: A digit followed by an optional
-                                      # insertion code (Hetero-flags make no sense in
-                                      # context with missing res)
-        """,
-        re.VERBOSE,
-    )
-    match = pattern.match(line)
+    match = _RE_REMARK_465.match(line)
     if match is None:
         return None
     residue = {}
@@ -177,7 +211,391 @@ def _parse_remark_465(line):
     return residue
 
 
-def _parse_pdb_header_list(header):
+# HELIX class numbers 1 to 10, see the PDB format specification
+_HELIX_TYPES = (
+    None,
+    "Right-handed alpha",
+    "Right-handed omega",
+    "Right-handed pi",
+    "Right-handed gamma",
+    "Right-handed 310",
+    "Left-handed alpha",
+    "Left-handed omega",
+    "Left-handed gamma",
+    "27 ribbon/helix",
+    "Polyproline",
+)
+
+
+def _get_helix_type(i):
+    return _HELIX_TYPES[i] if 0 < i < len(_HELIX_TYPES) else None
+
+
+class _HeaderState:
+    """Book-keeping carried between header records while parsing (PRIVATE)."""
+
+    def __init__(self):
+        self.comp_molid = "1"
+        self.last_comp_key = "misc"
+        self.last_src_key = "misc"
+        self.sheets = []
+        self.n_res_site = 0
+        # Multi-line fields are collected here and joined at the end
+        self.name = []
+        self.keywords = []
+        self.author = []
+        self.journal = []
+        self.journal_reference = []
+        self.references = []
+        self.reference = []
+
+
+# Record handlers used by _parse_pdb_header_list, each taking the raw line,
+# its stripped content after column 10, the dictionary being filled in and
+# the parsing state.
+
+
+def _handle_title(hh, tail, pdbh_dict, state):
+    name = _chop_end_codes(tail).lower()
+    if name:
+        state.name.append(name)
+
+
+def _handle_header(hh, tail, pdbh_dict, state):
+    rr = _RE_DATE.search(tail)
+    if rr is not None:
+        pdbh_dict["deposition_date"] = _format_date(rr.group())
+    rr = _RE_IDCODE.search(tail)
+    if rr is not None:
+        pdbh_dict["idcode"] = rr.group(1)
+    head = _chop_end_misc(tail).lower()
+    pdbh_dict["head"] = head
+
+
+def _handle_compnd(hh, tail, pdbh_dict, state):
+    tt = _chop_end_codes(tail).lower()
+    if tt.endswith(";"):
+        tt = tt[:-1]
+    # look for E.C. numbers in COMPND lines
+    rec = _RE_EC.search(tt)
+    if rec:
+        pdbh_dict["compound"][state.comp_molid]["ec_number"] = rec.group()
+        tt = _RE_EC_PAREN.sub("", tt)
+    tok = tt.split(":")
+    if len(tok) >= 2:
+        ckey = tok[0]
+        cval = tok[1].lstrip()
+        if ckey == "mol_id":
+            pdbh_dict["compound"][cval] = {"misc": ""}
+            state.comp_molid = cval
+            state.last_comp_key = "misc"
+        else:
+            pdbh_dict["compound"][state.comp_molid][ckey] = cval
+            state.last_comp_key = ckey
+    else:
+        pdbh_dict["compound"][state.comp_molid][state.last_comp_key] += tok[0] + " "
+
+
+def _handle_source(hh, tail, pdbh_dict, state):
+    tt = _chop_end_codes(tail).lower()
+    if tt.endswith(";"):
+        tt = tt[:-1]
+    tok = tt.split(":")
+    # print(tok)
+    if len(tok) >= 2:
+        ckey = tok[0]
+        cval = tok[1].lstrip()
+        if ckey == "mol_id":
+            pdbh_dict["source"][cval] = {"misc": ""}
+            state.comp_molid = cval
+            state.last_src_key = "misc"
+        else:
+            pdbh_dict["source"][state.comp_molid][ckey] = cval
+            state.last_src_key = ckey
+    else:
+        pdbh_dict["source"][state.comp_molid][state.last_src_key] += tok[0] + " "
+
+
+def _handle_keywds(hh, tail, pdbh_dict, state):
+    state.keywords.append(_chop_end_codes(tail).lower())
+
+
+def _handle_expdta(hh, tail, pdbh_dict, state):
+    expd = _chop_end_codes(tail)
+    # chop junk at end of lines for some structures
+    expd = _RE_EXPDTA_TAIL.sub("", expd)
+    # if re.search('\Anmr',expd,re.IGNORECASE): expd='nmr'
+    # if re.search('x-ray diffraction',expd,re.IGNORECASE): expd='x-ray diffraction'
+    pdbh_dict["structure_method"] = expd.lower()
+
+
+def _handle_revdat(hh, tail, pdbh_dict, state):
+    rr = _RE_DATE.search(tail)
+    if rr is not None:
+        pdbh_dict["release_date"] = _format_date(rr.group())
+
+
+def _handle_jrnl(hh, tail, pdbh_dict, state):
+    # JRNL        AUTH   L.CHEN,M.DOI,F.S.MATHEWS,A.Y.CHISTOSERDOV,           2BBK   7
+    state.journal_reference.append(hh[19:72].lower())
+    state.journal.append(tail)
+
+
+def _handle_author(hh, tail, pdbh_dict, state):
+    state.author.append(_nice_case(_chop_end_codes(tail)))
+
+
+def _handle_remark_1(hh, tail, pdbh_dict, state):
+    # REMARK   1 REFERENCE 1                                                  1CSE  11
+    # REMARK   1  AUTH   W.BODE,E.PAPAMOKOS,D.MUSIL                           1CSE  12
+    if hh.startswith("REMARK   1 REFERENCE"):
+        _add_reference(state.references, state.reference)
+        state.reference = []
+    else:
+        state.reference.append(hh[19:72].lower())
+
+
+def _handle_remark_2(hh, tail, pdbh_dict, state):
+    if hh.startswith("REMARK   2 RESOLUTION."):
+        r = _chop_end_codes(hh[22:])
+        r = _RE_ANGSTROM.sub("", r)
+        try:
+            pdbh_dict["resolution"] = float(r)
+        except ValueError:
+            # print('nonstandard resolution %r' % r)
+            pdbh_dict["resolution"] = None
+
+
+def _handle_remark_465(hh, tail, pdbh_dict, state):
+    if tail:
+        pdbh_dict["has_missing_residues"] = True
+        missing_res_info = _parse_remark_465(tail)
+        if missing_res_info:
+            pdbh_dict["missing_residues"].append(missing_res_info)
+
+
+def _handle_remark_99(hh, tail, pdbh_dict, state):
+    if hh.startswith("REMARK  99 ASTRAL"):
+        if tail:
+            remark_99_keyval = tail.replace("ASTRAL ", "").split(": ")
+            if type(remark_99_keyval) == list and len(remark_99_keyval) == 2:
+                if "astral" not in pdbh_dict:
+                    pdbh_dict["astral"] = {
+                        remark_99_keyval[0]: remark_99_keyval[1]
+                    }
+                else:
+                    pdbh_dict["astral"][remark_99_keyval[0]] = remark_99_keyval[1]
+
+
+def _handle_helix(hh, tail, pdbh_dict, state):
+    class_number = int(hh[38:40])
+    pdbh_dict["helices"].append({"serial_number":               int(hh[ 7:10]),
+                                 "helix_id":                        hh[11:14],
+                                 "initial_residue_name":            hh[15:18],
+                                 "chain_id":                        hh[19],
+                                 "initial_sequence_number":     int(hh[21:25]),
+                                 "initial_insertation_code":        hh[25],
+                                 "terminal_residue_name":           hh[27:30].strip(),
+                                 "terminal_sequence_number":    int(hh[33:37]),
+                                 "terminal_insertation_code":       hh[37],
+                                 "class_number":                class_number,
+                                 "helix_type":   _get_helix_type(class_number),
+                                 "comment":                         hh[40:70].strip(),
+                                 "length":                      int(hh[71:76])})
+
+
+_NO_SHEET_REGISTRATION = {
+    "current_atom_name": None,
+    "current_residue_name": None,
+    "current_chain_id": None,
+    "current_sequence_number": None,
+    "current_insertation_code": None,
+    "previous_atom_name": None,
+    "previous_residue_name": None,
+    "previous_chain_id": None,
+    "previous_sequence_number": None,
+    "previous_insertation_code": None,
+}
+
+
+def _handle_sheet(hh, tail, pdbh_dict, state):
+    strand = {"strand":                   int(hh[ 7:10]),
+              "sheet_id":                     hh[11:14],
+              "number_of_strands":        int(hh[14:16]),
+              "initial_residue_name":         hh[17:20].strip(),
+              "initial_chain_id":             hh[21],
+              "initial_sequence_number":  int(hh[22:26]),
+              "initial_insertation_code":     hh[26],
+              "terminal_residue_name":        hh[28:31].strip(),
+              "terminal_chain_id":            hh[32],
+              "terminal_sequence_number": int(hh[33:37]),
+              "terminal_insertation_code":    hh[37]}
+    try:
+        strand["sense"] = int(hh[38:40])
+    except Exception:
+        strand["sense"] = None
+    try:
+        strand.update({"current_atom_name":              hh[41:45],
+                       "current_residue_name":           hh[45:48].strip(),
+                       "current_chain_id":               hh[49],
+                       "current_sequence_number":    int(hh[50:54]),
+                       "current_insertation_code":       hh[54],
+                       "previous_atom_name":             hh[56:60],
+                       "previous_residue_name":          hh[60:63].strip(),
+                       "previous_chain_id":              hh[64],
+                       "previous_sequence_number":   int(hh[65:69]),
+                       "previous_insertation_code":      hh[69]})
+    except Exception:
+        # No registration, as for the first strand of a sheet
+        strand.update(_NO_SHEET_REGISTRATION)
+    if strand["sheet_id"] in state.sheets:
+        pdbh_dict["sheets"][-1].append(strand)
+    else:
+        pdbh_dict["sheets"].append([strand])
+        state.sheets.append(strand["sheet_id"])
+
+
+def _handle_ssbond(hh, tail, pdbh_dict, state):
+    ss_bond = {"serial_number":       int(hh[7:10]),
+               "chain_id_1":              hh[15],
+               "sequence_number_1":   int(hh[17:21]),
+               "insertaion_code_1":       hh[21],
+               "chain_id_2":              hh[29],
+               "sequence_number_2":   int(hh[31:35]),
+               "insertation_code_2":      hh[35],
+               "symmetry_operator_1":     None,
+               "symmetry_operator_2":     None,
+               "bond_distance":           None}
+    pdbh_dict["ss_bonds"].append(ss_bond)
+    try:
+        ss_bond["bond_distance"] = float(hh[73:78])
+    except Exception:
+        pass
+    try:
+        ss_bond["symmetry_operator_1"] = int(hh[59:65])
+        ss_bond["symmetry_operator_2"] = int(hh[66:72])
+    except Exception:
+        pass
+
+
+def _handle_link(hh, tail, pdbh_dict, state):
+    pdbh_dict["links"].append({"atom_name_1":                   hh[12:16],
+                               "alt_loc_1":                     hh[17],
+                               "residue_name_1":                hh[17:20].strip(),
+                               "chain_id_1":                    hh[22],
+                               "residue_sequence_number_1": int(hh[22:26]),
+                               "insertaion_code_1":             hh[26],
+                               "atom_name_2":                   hh[42:46],
+                               "alt_loc_2":                     hh[46],
+                               "residue_name_2":                hh[47:50].strip(),
+                               "chain_id_2":                    hh[51],
+                               "residue_sequence_number_2": int(hh[52:56]),
+                               "insertaion_code_2":             hh[56],
+                               "symmetry_operator_1":       int(hh[59:65]),
+                               "symmetry_operator_2":       int(hh[66:72]),
+                               "link_distance":           float(hh[73:78])})
+
+
+def _handle_cispep(hh, tail, pdbh_dict, state):
+    pdbh_dict["cis_peptides"].append({"serial_number":                 hh[ 7:10],
+                                      "residue_name_1":                hh[11:14].strip(),
+                                      "chain_id_1":                    hh[15],
+                                      "residue_sequence_number_1": int(hh[17:21]),
+                                      "insertaion_code_1":             hh[21],
+                                      "residue_name_2":                hh[25:28].strip(),
+                                      "chain_id_2":                    hh[29],
+                                      "residue_sequence_number_2": int(hh[31:35]),
+                                      "insertaion_code_2":             hh[35],
+                                      "model_number":              int(hh[43:46]),
+                                      "angle":                   float(hh[53:59])})
+
+
+# Start of each of the up to four residues in a SITE record
+_SITE_RESIDUE_COLUMNS = (18, 29, 40, 51)
+
+
+def _handle_site(hh, tail, pdbh_dict, state):
+    if not int(hh[7:10]) - 1:
+        state.n_res_site = int(hh[15:17])
+        pdbh_dict["sites"].append({"site_id": hh[11:14],
+                                   "residues": []})
+    if state.n_res_site < 4:
+        n_res_mod = state.n_res_site % 4
+    else:
+        n_res_mod = 4
+        state.n_res_site -= 4
+    # Trailing spaces of the 80 column record may be missing
+    hh = hh.rstrip().ljust(80)
+    residues = pdbh_dict["sites"][-1]["residues"]
+    for i in _SITE_RESIDUE_COLUMNS[:n_res_mod]:
+        residues.append({"residue_name":                hh[i:i+3].strip(),
+                         "chain_id":                    hh[i+4],
+                         "residue_sequence_number": int(hh[i+5:i+9]),
+                         "insertation_code":            hh[i+9]})
+
+
+# REMARK records are looked up by their first ten columns, e.g. "REMARK 465"
+_HANDLERS = {
+    "TITLE": _handle_title,
+    "HEADER": _handle_header,
+    "COMPND": _handle_compnd,
+    "SOURCE": _handle_source,
+    "KEYWDS": _handle_keywds,
+    "EXPDTA": _handle_expdta,
+    "REVDAT": _handle_revdat,
+    "JRNL": _handle_jrnl,
+    "AUTHOR": _handle_author,
+    "REMARK   1": _handle_remark_1,
+    "REMARK   2": _handle_remark_2,
+    "REMARK 465": _handle_remark_465,
+    "REMARK  99": _handle_remark_99,
+    "HELIX": _handle_helix,
+    "SHEET": _handle_sheet,
+    "SSBOND": _handle_ssbond,
+    "LINK": _handle_link,
+    "CISPEP": _handle_cispep,
+    "SITE": _handle_site,
+}
+
+# The records (keys of _HANDLERS) needed for each field of the dictionary
+_FIELD_RECORDS = {
+    "name": ("TITLE",),
+    "head": ("HEADER",),
+    "idcode": ("HEADER",),
+    "deposition_date": ("HEADER",),
+    "release_date": ("REVDAT",),
+    "structure_method": ("EXPDTA", "REMARK   2"),
+    "resolution": ("REMARK   2",),
+    "structure_reference": ("REMARK   1",),
+    "journal_reference": ("JRNL",),
+    "journal": ("JRNL",),
+    "author": ("AUTHOR",),
+    "compound": ("COMPND",),
+    "source": ("SOURCE",),
+    "keywords": ("KEYWDS",),
+    "has_missing_residues": ("REMARK 465",),
+    "missing_residues": ("REMARK 465",),
+    "astral": ("REMARK  99",),
+    "helices": ("HELIX",),
+    "sheets": ("SHEET",),
+    "ss_bonds": ("SSBOND",),
+    "links": ("LINK",),
+    "cis_peptides": ("CISPEP",),
+    "sites": ("SITE",),
+}
+
+
+def _parse_pdb_header_list(header, fields=None):
+    """Parse PDB header lines into a dictionary (PRIVATE).
+
+    Takes any iterable of lines, such as a list or an open file, and stops
+    at the first coordinate record (ATOM, HETATM or MODEL).
+
+    If fields is given, only the records needed for those keys are parsed,
+    and only those keys are returned. Reading stops once the records for all
+    the requested fields have been seen (records of the same type are
+    consecutive in a PDB file).
+    """
     # database fields
     pdbh_dict = {
         "name": "",
@@ -202,287 +620,61 @@ def _parse_pdb_header_list(header):
         "sites": [],
     }
 
-    def __get_helix_type(i):
-        if   i ==  1:
-            return "Right-handed alpha"
-        elif i ==  2:
-            return "Right-handed omega"
-        elif i ==  3:
-            return "Right-handed pi"
-        elif i ==  4:
-            return "Right-handed gamma"
-        elif i ==  5:
-            return "Right-handed 310"
-        elif i ==  6:
-            return "Left-handed alpha"
-        elif i ==  7:
-            return "Left-handed omega"
-        elif i ==  8:
-            return "Left-handed gamma"
-        elif i ==  9:
-            return "27 ribbon/helix"
-        elif i == 10:
-            return "Polyproline"
+    state = _HeaderState()
+    if fields is None:
+        handlers = _HANDLERS
+        pending = None
+    else:
+        if isinstance(fields, str):
+            fields = {fields}
         else:
-            return None
-
-    pdbh_dict["structure_reference"] = _get_references(header)
-    pdbh_dict["journal_reference"] = _get_journal(header)
-    comp_molid = "1"
-    last_comp_key = "misc"
-    last_src_key = "misc"
-    sheets = []
-    n_res_site = 0
+            fields = set(fields)
+        unknown = fields.difference(_FIELD_RECORDS)
+        if unknown:
+            raise ValueError(
+                "Unknown PDB header field(s): %s" % ", ".join(sorted(unknown))
+            )
+        handlers = {}
+        for field in fields:
+            for record in _FIELD_RECORDS[field]:
+                handlers[record] = _HANDLERS[record]
+        pending = set(handlers)
 
     for hh in header:
-        h = re.sub(r"[\s\n\r]*\Z", "", hh)  # chop linebreaks off
+        if hh.startswith(("ATOM  ", "HETATM", "MODEL ")):
+            break
+        h = hh.rstrip()  # chop linebreaks off
         # key=re.sub("\s.+\s*","",h)
         key = h[:6].strip()
-        # tail=re.sub("\A\w+\s+\d*\s*","",h)
-        tail = h[10:].strip()
-        # print("%s:%s" % (key, tail)
+        if key == "REMARK":
+            key = hh[:10]
 
         # From here, all the keys from the header are being parsed
-        if key == "TITLE":
-            name = _chop_end_codes(tail).lower()
-            pdbh_dict["name"] = " ".join([pdbh_dict["name"], name]).strip()
-        elif key == "HEADER":
-            rr = re.search(r"\d\d-\w\w\w-\d\d", tail)
-            if rr is not None:
-                pdbh_dict["deposition_date"] = _format_date(_nice_case(rr.group()))
-            rr = re.search(r"\s+([1-9][0-9A-Z]{3})\s*\Z", tail)
-            if rr is not None:
-                pdbh_dict["idcode"] = rr.group(1)
-            head = _chop_end_misc(tail).lower()
-            pdbh_dict["head"] = head
-        elif key == "COMPND":
-            tt = re.sub(r"\;\s*\Z", "", _chop_end_codes(tail)).lower()
-            # look for E.C. numbers in COMPND lines
-            rec = re.search(r"\d+\.\d+\.\d+\.\d+", tt)
-            if rec:
-                pdbh_dict["compound"][comp_molid]["ec_number"] = rec.group()
-                tt = re.sub(r"\((e\.c\.)*\d+\.\d+\.\d+\.\d+\)", "", tt)
-            tok = tt.split(":")
-            if len(tok) >= 2:
-                ckey = tok[0]
-                cval = re.sub(r"\A\s*", "", tok[1])
-                if ckey == "mol_id":
-                    pdbh_dict["compound"][cval] = {"misc": ""}
-                    comp_molid = cval
-                    last_comp_key = "misc"
-                else:
-                    pdbh_dict["compound"][comp_molid][ckey] = cval
-                    last_comp_key = ckey
-            else:
-                pdbh_dict["compound"][comp_molid][last_comp_key] += tok[0] + " "
-        elif key == "SOURCE":
-            tt = re.sub(r"\;\s*\Z", "", _chop_end_codes(tail)).lower()
-            tok = tt.split(":")
-            # print(tok)
-            if len(tok) >= 2:
-                ckey = tok[0]
-                cval = re.sub(r"\A\s*", "", tok[1])
-                if ckey == "mol_id":
-                    pdbh_dict["source"][cval] = {"misc": ""}
-                    comp_molid = cval
-                    last_src_key = "misc"
-                else:
-                    pdbh_dict["source"][comp_molid][ckey] = cval
-                    last_src_key = ckey
-            else:
-                pdbh_dict["source"][comp_molid][last_src_key] += tok[0] + " "
-        elif key == "KEYWDS":
-            kwd = _chop_end_codes(tail).lower()
-            if "keywords" in pdbh_dict:
-                pdbh_dict["keywords"] += " " + kwd
-            else:
-                pdbh_dict["keywords"] = kwd
-        elif key == "EXPDTA":
-            expd = _chop_end_codes(tail)
-            # chop junk at end of lines for some structures
-            expd = re.sub(r"\s\s\s\s\s\s\s.*\Z", "", expd)
-            # if re.search('\Anmr',expd,re.IGNORECASE): expd='nmr'
-            # if re.search('x-ray diffraction',expd,re.IGNORECASE): expd='x-ray diffraction'
-            pdbh_dict["structure_method"] = expd.lower()
-        elif key == "CAVEAT":
-            # make Annotation entries out of these!!!
-            pass
-        elif key == "REVDAT":
-            rr = re.search(r"\d\d-\w\w\w-\d\d", tail)
-            if rr is not None:
-                pdbh_dict["release_date"] = _format_date(_nice_case(rr.group()))
-        elif key == "JRNL":
-            # print("%s:%s" % (key, tail))
-            if "journal" in pdbh_dict:
-                pdbh_dict["journal"] += tail
-            else:
-                pdbh_dict["journal"] = tail
-        elif key == "AUTHOR":
-            auth = _nice_case(_chop_end_codes(tail))
-            if "author" in pdbh_dict:
-                pdbh_dict["author"] += auth
-            else:
-                pdbh_dict["author"] = auth
-        elif key == "REMARK":
-            if re.search("REMARK   2 RESOLUTION.", hh):
-                r = _chop_end_codes(re.sub("REMARK   2 RESOLUTION.", "", hh))
-                r = re.sub(r"\s+ANGSTROM.*", "", r)
-                try:
-                    pdbh_dict["resolution"] = float(r)
-                except ValueError:
-                    # print('nonstandard resolution %r' % r)
-                    pdbh_dict["resolution"] = None
-            elif hh.startswith("REMARK 465"):
-                if tail:
-                    pdbh_dict["has_missing_residues"] = True
-                    missing_res_info = _parse_remark_465(tail)
-                    if missing_res_info:
-                        pdbh_dict["missing_residues"].append(missing_res_info)
-            elif hh.startswith("REMARK  99 ASTRAL"):
-                if tail:
-                    remark_99_keyval = tail.replace("ASTRAL ", "").split(": ")
-                    if type(remark_99_keyval) == list and len(remark_99_keyval) == 2:
-                        if "astral" not in pdbh_dict:
-                            pdbh_dict["astral"] = {
-                                remark_99_keyval[0]: remark_99_keyval[1]
-                            }
-                        else:
-                            pdbh_dict["astral"][remark_99_keyval[0]] = remark_99_keyval[1]
-        elif key == "HELIX":
-            pdbh_dict["helices"].append({"serial_number":               int(hh[ 7:10]),
-                                         "helix_id":                        hh[11:14],
-                                         "initial_residue_name":            hh[15:18],
-                                         "chain_id":                        hh[19],
-                                         "initial_sequence_number":     int(hh[21:25]),
-                                         "initial_insertation_code":        hh[25],
-                                         "terminal_residue_name":           hh[27:30].strip(),
-                                         "terminal_sequence_number":    int(hh[33:37]),
-                                         "terminal_insertation_code":       hh[37],
-                                         "class_number":                int(hh[38:40]),
-                                         "helix_type": __get_helix_type(int(hh[38:40])),
-                                         "comment":                         hh[40:70].strip(),
-                                         "length":                      int(hh[71:76])})
-        elif key == "SHEET":
-            strand = {"strand":                   int(hh[ 7:10]),
-                      "sheet_id":                     hh[11:14],
-                      "number_of_strands":        int(hh[14:16]),
-                      "initial_residue_name":         hh[17:20].strip(),
-                      "initial_chain_id":             hh[21],
-                      "initial_sequence_number":  int(hh[22:26]),
-                      "initial_insertation_code":     hh[26],
-                      "terminal_residue_name":        hh[28:31].strip(),
-                      "terminal_chain_id":            hh[32],
-                      "terminal_sequence_number": int(hh[33:37]),
-                      "terminal_insertation_code":    hh[37],
-                      "sense":                        None,
-                      "current_atom_name":            None,
-                      "current_residue_name":         None,
-                      "current_chain_id":             None,
-                      "current_sequence_number":      None,
-                      "current_insertation_code":     None,
-                      "previous_atom_name":           None,
-                      "previous_residue_name":        None,
-                      "previous_chain_id":            None,
-                      "previous_sequence_number":     None,
-                      "previous_insertation_code":    None}
-            try:
-                strand["sense"] = int(hh[38:40])
-            except Exception:
-                pass
-            try:
-                strand["current_atom_name"]=             hh[41:45]
-                strand["current_residue_name"] =         hh[45:48].strip()
-                strand["current_chain_id"] =             hh[49]
-                strand["current_sequence_number"] =  int(hh[50:54])
-                strand["current_insertation_code"] =     hh[54]
-                strand["previous_atom_name"] =           hh[56:60]
-                strand["previous_residue_name"] =        hh[60:63].strip()
-                strand["previous_chain_id"] =            hh[64]
-                strand["previous_sequence_number"] = int(hh[65:69])
-                strand["previous_insertation_code"] =    hh[69]
-            except Exception:
-                pass
-            if strand["sheet_id"] in sheets:
-                pdbh_dict["sheets"][-1].append(strand)
-            else:
-                pdbh_dict["sheets"].append([strand])
-                sheets.append(strand["sheet_id"])
-            except Exception:
-                pass
-            if strand["sheet_id"] in sheets:
-                pdbh_dict["sheets"][-1].append(strand)
-            else:
-                pdbh_dict["sheets"].append([strand])
-                sheets.append(strand["sheet_id"])
-        elif key == "SSBOND":
-            pdbh_dict["ss_bonds"].append({"serial_number":       int(hh[7:10]),
-                                          "chain_id_1":              hh[15],
-                                          "sequence_number_1":   int(hh[17:21]),
-                                          "insertaion_code_1":       hh[21],
-                                          "chain_id_2":              hh[29],
-                                          "sequence_number_2":   int(hh[31:35]),
-                                          "insertation_code_2":      hh[35],
-                                          "symmetry_operator_1":     None,
-                                          "symmetry_operator_2":     None,
-                                          "bond_distance":           None})
-            try:
-                pdbh_dict["ss_bonds"][-1]["bond_distance"] = float(hh[73:78])
-            except Exception:
-                pass
-            try:
-                pdbh_dict["ss_bonds"][-1]["symmetry_operator_1"] = int(hh[59:65])
-                pdbh_dict["ss_bonds"][-1]["symmetry_operator_2"] = int(hh[66:72])
-            except Exception:
-                pass
-        elif key == "LINK":
-            pdbh_dict["links"].append({"atom_name_1":                   hh[12:16],
-                                       "alt_loc_1":                     hh[17],
-                                       "residue_name_1":                hh[17:20].strip(),
-                                       "chain_id_1":                    hh[22],
-                                       "residue_sequence_number_1": int(hh[22:26]),
-                                       "insertaion_code_1":             hh[26],
-                                       "atom_name_2":                   hh[42:46],
-                                       "alt_loc_2":                     hh[46],
-                                       "residue_name_2":                hh[47:50].strip(),
-                                       "chain_id_2":                    hh[51],
-                                       "residue_sequence_number_2": int(hh[52:56]),
-                                       "insertaion_code_2":             hh[56],
-                                       "symmetry_operator_1":       int(hh[59:65]),
-                                       "symmetry_operator_2":       int(hh[66:72]),
-                                       "link_distance":           float(hh[73:78])})
-        elif key == "CISPEP":
-            pdbh_dict["cis_peptides"].append({"serial_number":                 hh[ 7:10],
-                                              "residue_name_1":                hh[11:14].strip(),
-                                              "chain_id_1":                    hh[15],
-                                              "residue_sequence_number_1": int(hh[17:21]),
-                                              "insertaion_code_1":             hh[21],
-                                              "residue_name_2":                hh[25:28].strip(),
-                                              "chain_id_2":                    hh[29],
-                                              "residue_sequence_number_2": int(hh[31:35]),
-                                              "insertaion_code_2":             hh[35],
-                                              "model_number":              int(hh[43:46]),
-                                              "angle":                   float(hh[53:59])})
-        elif key == "SITE":
-            if not int(hh[7:10]) - 1:
-                n_res_site = int(hh[15:17])
-                pdbh_dict["sites"].append({"site_id": hh[11:14],
-                                           "residues": []})
-            if n_res_site < 4:
-                n_res_mod = n_res_site % 4
-            else:
-                n_res_mod = 4
-                n_res_site -= 4
-            site = [{"residue_name":                hh[i:i+3].strip(),
-                     "chain_id":                    hh[i+4],
-                     "residue_sequence_number": int(hh[i+5:i+9]),
-                     "insertation_code":            hh[i+10]}
-                    for i in range(18, 1 + n_res_mod * 11, 11)]
-            pdbh_dict["sites"][-1]["residues"] += site
-        else:
-            # print(key)
-            pass
+        handler = handlers.get(key)
+        if handler:
+            # tail=re.sub("\A\w+\s+\d*\s*","",h)
+            tail = h[10:].strip()
+            handler(hh, tail, pdbh_dict, state)
+            if pending:
+                pending.discard(key)
+        elif pending is not None and not pending:
+            # past the last of the requested records
+            break
+    pdbh_dict["name"] = " ".join(state.name)
+    if state.keywords:
+        pdbh_dict["keywords"] = " ".join(state.keywords)
+    pdbh_dict["author"] = "".join(state.author)
+    if state.journal:
+        pdbh_dict["journal"] = "".join(state.journal)
+    _add_reference(state.references, state.reference)
+    pdbh_dict["structure_reference"] = state.references
+    pdbh_dict["journal_reference"] = _RE_WS.sub(
+        " ", "".join(state.journal_reference)
+    )
     if pdbh_dict["structure_method"] == "unknown":
         res = pdbh_dict["resolution"]
         if res is not None and res > 0.0:
             pdbh_dict["structure_method"] = "x-ray diffraction"
+    if fields is not None:
+        return {key: value for key, value in pdbh_dict.items() if key in fields}
     return pdbh_dict
@@ -20,6 +20,8 @@ except ImportError:
 
 from Bio.PDB import PDBParser
 from Bio.PDB.parse_pdb_header import parse_pdb_header, _parse_remark_465
+from Bio.PDB.parse_pdb_header import _chop_end_codes, _chop_end_misc
+from Bio.PDB.parse_pdb_header import _parse_pdb_header_list
 
 
 class ParseReal(unittest.TestCase):
@@ -139,6 +141,24 @@ class ParseReal(unittest.TestCase):
             {"model": 1, "res_name": "DG", "chain": "B", "ssseq": 9, "insertion": None},
         )
 
+    def test_chop_end_codes(self):
+        """A UNIT-test for the private functions chopping line end codes."""
+        self.assertEqual(
+            _chop_end_codes("CYTOCHROME C'                                   1CSA  14"),
+            "CYTOCHROME C'",
+        )
+        self.assertEqual(_chop_end_codes("HIV CAPSID      1A8O   5"), "HIV CAPSID")
+        self.assertEqual(_chop_end_codes("HIV CAPSID 1A8O   5"), "HIV CAPSID 1A8O   5")
+        self.assertEqual(_chop_end_codes("PROTEIN FIBRIL"), "PROTEIN FIBRIL")
+        self.assertEqual(
+            _chop_end_misc("TRANSFERASE                             14-JUL-97   1CSA"),
+            "TRANSFERASE",
+        )
+        self.assertEqual(
+            _chop_end_misc("TRANSFERASE 14-JUL-97   0CSA"),
+            "TRANSFERASE 14-JUL-97   0CSA",
+        )
+
     def test_parse_header_line(self):
         """Unit test for parsing and converting fields in HEADER record."""
         header = parse_pdb_header("PDB/header.pdb")
@@ -161,6 +181,73 @@ class ParseReal(unittest.TestCase):
         header = parse_pdb_header("PDB/occupancy.pdb")
         self.assertEqual(header["name"], "")
 
+    def test_parse_sheet(self):
+        """Unit test for the registration of SHEET records."""
+        header = parse_pdb_header("PDB/2BEG.pdb")
+        first, second = header["sheets"][0][:2]
+        self.assertEqual(first["sense"], 0)
+        self.assertIsNone(first["current_atom_name"])
+        self.assertIsNone(first["previous_sequence_number"])
+        self.assertEqual(second["sense"], 1)
+        self.assertEqual(second["current_atom_name"], " O  ")
+        self.assertEqual(second["current_residue_name"], "PHE")
+        self.assertEqual(second["current_sequence_number"], 19)
+        self.assertEqual(second["previous_chain_id"], "A")
+        self.assertEqual(second["previous_sequence_number"], 20)
+
+    def test_parse_site(self):
+        """Unit test for parsing all residues of SITE records."""
+        header = parse_pdb_header("PDB/1LCD.pdb")
+        self.assertEqual(len(header["sites"]), 1)
+        self.assertEqual(header["sites"][0]["site_id"], "AC1")
+        residues = header["sites"][0]["residues"]
+        self.assertEqual(len(residues), 6)
+        self.assertEqual(
+            residues[3],
+            {
+                "residue_name": "DC",
+                "chain_id": "C",
+                "residue_sequence_number": 3,
+                "insertation_code": " ",
+            },
+        )
+        self.assertEqual(residues[5]["residue_name"], "HOH")
+        self.assertEqual(residues[5]["residue_sequence_number"], 923)
+        # Same with Windows line endings, given as a list of lines
+        with open("PDB/1LCD.pdb") as handle:
+            lines = [line.replace("\n", "\r\n") for line in handle]
+        header = _parse_pdb_header_list(lines, fields=["sites"])
+        self.assertEqual(header["sites"][0]["residues"], residues)
+
+    def test_parse_fields(self):
+        """Unit test for parsing only some fields of the header."""
+        header = parse_pdb_header("PDB/1A8O.pdb", fields={"idcode", "resolution"})
+        self.assertEqual(header, {"idcode": "1A8O", "resolution": 1.7})
+        full = parse_pdb_header("PDB/2BEG.pdb")
+        header = parse_pdb_header(
+            "PDB/2BEG.pdb", fields=["structure_method", "sheets", "author"]
+        )
+        # Same values, in the same key order as for a full parse
+        self.assertEqual(list(header), ["structure_method", "author", "sheets"])
+        for key, value in header.items():
+            self.assertEqual(value, full[key])
+        header = parse_pdb_header("PDB/2BEG.pdb", fields="structure_method")
+        self.assertEqual(header, {"structure_method": "solution nmr"})
+        with self.assertRaises(ValueError) as cm:
+            parse_pdb_header("PDB/2BEG.pdb", fields=["resolutions", "heads", "name"])
+        self.assertEqual(
+            str(cm.exception), "Unknown PDB header field(s): heads, resolutions"
+        )
+
+    def test_parse_fields_stops_early(self):
+        """Unit test that reading stops once the requested fields are seen."""
+        with open("PDB/1A8O.pdb") as handle:
+            lines = iter(handle.readlines())
+        header = _parse_pdb_header_list(lines, fields={"idcode"})
+        self.assertEqual(header, {"idcode": "1A8O"})
+        # Only the HEADER line and the line after it should have been read
+        self.assertTrue(next(lines).startswith("COMPND"))
+
     def test_parse_pdb_with_remark_99(self):
         """Tests that parse_pdb_header can identify REMARK 99 ASTRAL entries."""
         header = parse_pdb_header("PDB/d256ba_.ent")